@@ -38,11 +38,12 @@ global variables:
 import freeOrionAIInterface as fo
 import FreeOrionAI as foAI
 import ColonisationAI
-import copy
 import traceback
 import math
+from bisect import bisect_left
 from collections import Counter
 from collections import defaultdict
+from collections import namedtuple
 from freeorion_tools import print_error, UserString
 
 # Define meta classes for the ship parts
@@ -57,6 +58,7 @@ TROOPS = frozenset({fo.shipPartClass.troops})
 WEAPONS = frozenset({fo.shipPartClass.shortRange, fo.shipPartClass.missiles,
                      fo.shipPartClass.fighters, fo.shipPartClass.pointDefense})
 ALL_META_CLASSES = frozenset({WEAPONS, ARMOUR, DETECTION, FUEL, STEALTH, SHIELDS, COLONISATION, ENGINES, TROOPS})
+META_CLASS_BY_PART_CLASS = {part_class: meta_class for meta_class in ALL_META_CLASSES for part_class in meta_class}
 
 # Prefixes for the test ship designs
 TESTDESIGN_NAME_BASE = "AI_TESTDESIGN"
@@ -66,6 +68,15 @@ TESTDESIGN_NAME_PART = TESTDESIGN_NAME_BASE+"_PART"
 # Hardcoded preferred hullname for testdesigns - should be a hull without conditions but with maximum different slottypes
 TESTDESIGN_PREFERRED_HULL = "SH_BASIC_MEDIUM"
 
+# Human readable form of AdditionalSpecifications.convert_to_tuple()
+REQUIREMENTS_TEMPLATE = "minFuel: %s, minSpeed: %s, enemyDmg: %s, enemyShields: %s, enemyMineDmg: %s"
+
+# Snapshot of the stats of a part type. Reading the attributes of the actual part objects is a call into the C++ part.
+PartInfo = namedtuple("PartInfo", "name partClass capacity mountableSlotTypes costTimeLocationInvariant")
+
+# The stats of a part compared to decide if it is strictly worse than another part.
+PartComparisonEntry = namedtuple("PartComparisonEntry", "part cost time mountableSlotTypes")
+
 MISSING_REQUIREMENT_MULTIPLIER = -1000
 INVALID_DESIGN_RATING = -999  # this needs to be negative but greater than MISSING_REQUIREMENT_MULTIPLIER
 
@@ -79,7 +90,9 @@ class ShipDesignCache(object):
     Important members:
     testhulls:                 # set of all hullnames used for testdesigns
     design_id_by_name          # {"designname": designid}
+    all_design_id_by_name      # {"designname": designid} for all designs of the empire, rebuilt each turn
     part_by_partname           # {"partname": part object}
+    hull_by_hullname           # {"hullname": hull object}
     map_reference_design_name  # {"reference_designname": "ingame_designname"}, cf. _build_reference_name()
     strictly_worse_parts       # strictly worse parts: {"part": ["worsePart1","worsePart2"]}
     hulls_for_planets          # buildable hulls per planet {planetID: ["buildableHull1","buildableHull2",...]}
@@ -97,7 +110,10 @@ class ShipDesignCache(object):
         """Cache is empty on creation"""
         self.testhulls = set()
         self.design_id_by_name = {}
+        self.all_design_id_by_name = {}
+        self.indexed_design_ids = set()  # designids already in all_design_id_by_name
         self.part_by_partname = {}
+        self.hull_by_hullname = {}
         self.map_reference_design_name = {}
         self.strictly_worse_parts = {}
         self.hulls_for_planets = {}
@@ -128,10 +144,18 @@ class ShipDesignCache(object):
         """Print the design_id_by_name cache."""
         print "DesignID cache:", self.design_id_by_name
 
+    def print_all_design_id_by_name(self):
+        """Print the all_design_id_by_name cache."""
+        print "DesignID index of all empire designs:", self.all_design_id_by_name
+
     def print_part_by_partname(self):
         """Print the part_by_partname cache."""
         print "Parts cached by name:", self.part_by_partname
 
+    def print_hull_by_hullname(self):
+        """Print the hull_by_hullname cache."""
+        print "Hulls cached by name:", self.hull_by_hullname
+
     def print_strictly_worse_parts(self):
         """Print the strictly_worse_parts cache."""
         print "List of strictly worse parts (ignoring slots):"
@@ -188,7 +212,7 @@ class ShipDesignCache(object):
         for classname in self.best_designs:
             print classname
             for req_tuple in self.best_designs[classname]:
-                print "    ", req_tuple
+                print "    ", REQUIREMENTS_TEMPLATE % req_tuple
                 for species_tuple in self.best_designs[classname][req_tuple]:
                     print "        ", species_tuple, " # relevant species stats"
                     for avParts in self.best_designs[classname][req_tuple][species_tuple]:
@@ -219,7 +243,9 @@ class ShipDesignCache(object):
         print "Printing the ShipDesignAI cache..."
         self.print_testhulls()
         self.print_design_id_by_name()
+        self.print_all_design_id_by_name()
         self.print_part_by_partname()
+        self.print_hull_by_hullname()
         self.print_strictly_worse_parts()
         self.print_map_reference_design_name()
         self.print_hulls_for_planets()
@@ -236,17 +262,28 @@ class ShipDesignCache(object):
         self.production_time.clear()
         empire = fo.getEmpire()
         empire_id = empire.empireID
-        for pid in _get_planets_with_shipyard():
-            self.production_time[pid] = {}
-            self.production_cost[pid] = {}
-            for partname in empire.availableShipParts:
-                part = _get_part_type(partname)
-                self.production_cost[pid][partname] = part.productionCost(empire_id, pid)
-                self.production_time[pid][partname] = part.productionTime(empire_id, pid)
-            for hullname in empire.availableShipHulls:
-                hull = fo.getHullType(hullname)
-                self.production_cost[pid][hullname] = hull.productionCost(empire_id, pid)
-                self.production_time[pid][hullname] = hull.productionTime(empire_id, pid)
+        parts_and_hulls = ([(partname, _get_part_type(partname)) for partname in empire.availableShipParts] +
+                           [(hullname, _get_hull_type(hullname)) for hullname in empire.availableShipHulls])
+        planets = _get_planets_with_shipyard()
+        if not planets:
+            return
+        reference_pid = next(iter(planets))
+        # The cost and time of location invariant items are the same for all planets, so only ask the engine once.
+        location_dependent_items = []
+        invariant_cost_cache = {}
+        invariant_time_cache = {}
+        for name, item in parts_and_hulls:
+            if item.costTimeLocationInvariant:
+                invariant_cost_cache[name] = item.productionCost(empire_id, reference_pid)
+                invariant_time_cache[name] = item.productionTime(empire_id, reference_pid)
+            else:
+                location_dependent_items.append((name, item))
+        for pid in planets:
+            local_cost_cache = self.production_cost[pid] = dict(invariant_cost_cache)
+            local_time_cache = self.production_time[pid] = dict(invariant_time_cache)
+            for name, item in location_dependent_items:
+                local_cost_cache[name] = item.productionCost(empire_id, pid)
+                local_time_cache[name] = item.productionTime(empire_id, pid)
 
     def _build_cache_after_load(self):
         """Build cache after loading or starting a game.
@@ -283,32 +320,47 @@ class ShipDesignCache(object):
         except Exception:
             self.part_by_partname.clear()
             traceback.print_exc()
+        try:
+            for hullname in self.hull_by_hullname:
+                cached_name = self.hull_by_hullname[hullname].name
+                if cached_name != hullname:
+                    self.hull_by_hullname[hullname] = fo.getHullType(hullname)
+                    print "WARNING: Hull cache corrupted."
+                    print "Expected: %s, got: %s. Cache was repaired." % (hullname, cached_name)
+        except Exception:
+            self.hull_by_hullname.clear()
+            traceback.print_exc()
 
+        # designids may change, so the index of all designs needs to be rebuilt
+        self.all_design_id_by_name.clear()
+        self.indexed_design_ids.clear()
         corrupted = []
         for designname in self.design_id_by_name:
             try:
                 cached_name = fo.getShipDesign(self.design_id_by_name[designname]).name(False)
-                if cached_name != designname:
-                    print "WARNING: ShipID cache corrupted."
-                    print "Expected: %s, got: %s. Repairing cache." % (designname, cached_name)
-                    design_id = next(iter([shipDesignID for shipDesignID in fo.getEmpire().allShipDesigns
-                                          if designname == fo.getShipDesign(shipDesignID).name(False)]), None)
-                    if design_id is not None:
-                        self.design_id_by_name[designname] = design_id
-                    else:
-                        corrupted.append(designname)
+                if cached_name == designname:
+                    continue
+                print "WARNING: ShipID cache corrupted."
+                print "Expected: %s, got: %s. Repairing cache." % (designname, cached_name)
             except AttributeError:
                 print "WARNING: ShipID cache corrupted. Could not get cached shipdesign. Repairing Cache."
                 print traceback.format_exc()  # do not print to stderr as this is an "expected" exception.
-                design_id = next(iter([shipDesignID for shipDesignID in fo.getEmpire().allShipDesigns
-                                      if designname == fo.getShipDesign(shipDesignID).name(False)]), None)
-                if design_id is not None:
-                    self.design_id_by_name[designname] = design_id
-                else:
-                    corrupted.append(designname)
+            self.update_all_design_id_by_name()
+            design_id = self.all_design_id_by_name.get(designname)
+            if design_id is not None:
+                self.design_id_by_name[designname] = design_id
+            else:
+                corrupted.append(designname)
         for corrupted_entry in corrupted:
             del self.design_id_by_name[corrupted_entry]
 
+    def update_all_design_id_by_name(self):
+        """Add the designs of the empire which are not indexed yet to all_design_id_by_name."""
+        for design_id in fo.getEmpire().allShipDesigns:
+            if design_id not in self.indexed_design_ids:
+                self.all_design_id_by_name.setdefault(fo.getShipDesign(design_id).name(False), design_id)
+                self.indexed_design_ids.add(design_id)
+
     def _update_buildable_items_this_turn(self, verbose=False):
         """Calculate which parts and hulls can be built on each planet this turn.
 
@@ -333,8 +385,13 @@ class ShipDesignCache(object):
         if not planets_with_shipyards:
             print "No shipyards found. The design process was aborted."
             return
+        pid = next(iter(self.production_cost), None)  # as only location invariant parts are compared, use any planet
+        if pid is None:
+            print "No production cost cached. The design process was aborted."
+            return
+        local_cost_cache = self.production_cost[pid]
+        local_time_cache = self.production_time[pid]
         get_shipdesign = fo.getShipDesign
-        get_hulltype = fo.getHullType
         empire = fo.getEmpire()
         empire_id = empire.empireID
         universe = fo.getUniverse()
@@ -349,42 +406,63 @@ class ShipDesignCache(object):
             print "WARNING: Tried to use '%s' as testhull but it is not in available_hulls." % TESTDESIGN_PREFERRED_HULL,
             print "Please update ShipDesignAI.py according to the new content."
             traceback.print_exc()
-        testdesign_names = [get_shipdesign(design_id).name(False) for design_id in empire.allShipDesigns
-                            if get_shipdesign(design_id).name(False).startswith(TESTDESIGN_NAME_BASE)]
-        testdesign_names_hull = [name for name in testdesign_names if name.startswith(TESTDESIGN_NAME_HULL)]
-        testdesign_names_part = [name for name in testdesign_names if name.startswith(TESTDESIGN_NAME_PART)]
-        available_slot_types = {slottype for slotlist in [get_hulltype(hull).slots for hull in available_hulls]
-                                for slottype in slotlist}
-        new_parts = [_get_part_type(part) for part in empire.availableShipParts
+        testdesign_names = [name for name in (get_shipdesign(design_id).name(False)
+                                              for design_id in empire.allShipDesigns)
+                            if name.startswith(TESTDESIGN_NAME_BASE)]
+        # sets as we check these for membership many times per planet
+        testdesign_names_hull = {name for name in testdesign_names if name.startswith(TESTDESIGN_NAME_HULL)}
+        testdesign_names_part = {name for name in testdesign_names if name.startswith(TESTDESIGN_NAME_PART)}
+
+        hull_slots = {hullname: tuple(_get_hull_type(hullname).slots) for hullname in available_hulls}
+        part_types = {}  # {partname: PartInfo}
+        for partname in set(self.strictly_worse_parts).union(empire.availableShipParts):
+            part = _get_part_type(partname)
+            part_types[partname] = PartInfo(part.name, part.partClass, part.capacity,
+                                            frozenset(part.mountableSlotTypes), part.costTimeLocationInvariant)
+        hull_testdesign_names = {hullname: "%s_%s" % (TESTDESIGN_NAME_HULL, hullname) for hullname in available_hulls}
+        part_testdesign_prefixes = {partname: "%s_%s_" % (TESTDESIGN_NAME_PART, partname) for partname in part_types}
+
+        available_slot_types = {slottype for slotlist in hull_slots.itervalues() for slottype in slotlist}
+        new_parts = [part_types[part] for part in empire.availableShipParts
                      if part not in self.strictly_worse_parts]
-        pid = self.production_cost.keys()[0]  # as only location invariant parts are considered, use arbitrary planet.
-        for new_part in new_parts:
-            self.strictly_worse_parts[new_part.name] = []
-            if not new_part.costTimeLocationInvariant:
-                print "new part %s not location invariant!" % new_part.name
-                continue
-            for part_class in ALL_META_CLASSES:
-                if new_part.partClass in part_class:
-                    for old_part in [_get_part_type(part) for part in self.strictly_worse_parts
-                                     if part != new_part.name]:
-                        if not old_part.costTimeLocationInvariant:
-                            print "old part %s not location invariant!" % old_part.name
-                            continue
-                        if old_part.partClass in part_class:
-                            if new_part.capacity >= old_part.capacity:
-                                a = new_part
-                                b = old_part
-                            else:
-                                a = old_part
-                                b = new_part
-                            if (self.production_cost[pid][a.name] <= self.production_cost[pid][b.name]
-                                    and {x for x in a.mountableSlotTypes} >= {x for x in b.mountableSlotTypes}
-                                    and self.production_time[pid][a.name] <= self.production_time[pid][b.name]):
-                                self.strictly_worse_parts[a.name].append(b.name)
-                                print "Part %s is strictly worse than part %s" % (b.name, a.name)
-                    break
+
+        def get_comparison_entry(part):
+            """Return the stats relevant to decide if a part is strictly worse than another one."""
+            return PartComparisonEntry(part, local_cost_cache[part.name], local_time_cache[part.name],
+                                       part.mountableSlotTypes)
+
+        # Usually no new parts become available, so the comparison with the known parts can be skipped.
+        if new_parts:
+            # Only parts of the same meta class are compared, so sort the known location invariant parts
+            # into buckets once instead of scanning all known parts for each new part.
+            part_buckets = defaultdict(list)  # {meta_class: [PartComparisonEntry]}
+            for old_part in [part_types[part] for part in self.strictly_worse_parts]:
+                if not old_part.costTimeLocationInvariant:
+                    print "old part %s not location invariant!" % old_part.name
+                    continue
+                part_class = META_CLASS_BY_PART_CLASS.get(old_part.partClass)
+                if part_class is not None:
+                    part_buckets[part_class].append(get_comparison_entry(old_part))
+            for new_part in new_parts:
+                self.strictly_worse_parts[new_part.name] = []
+                if not new_part.costTimeLocationInvariant:
+                    print "new part %s not location invariant!" % new_part.name
+                    continue
+                part_class = META_CLASS_BY_PART_CLASS.get(new_part.partClass)
+                if part_class is None:
+                    continue
+                new_entry = get_comparison_entry(new_part)
+                for old_entry in part_buckets[part_class]:
+                    if new_part.capacity >= old_entry.part.capacity:
+                        a, b = new_entry, old_entry
+                    else:
+                        a, b = old_entry, new_entry
+                    if a.cost <= b.cost and a.mountableSlotTypes >= b.mountableSlotTypes and a.time <= b.time:
+                        self.strictly_worse_parts[a.part.name].append(b.part.name)
+                        print "Part %s is strictly worse than part %s" % (b.part.name, a.part.name)
+                part_buckets[part_class].append(new_entry)
         available_parts = sorted(self.strictly_worse_parts.keys(),
-                                 key=lambda item: _get_part_type(item).capacity, reverse=True)
+                                 key=lambda item: part_types[item].capacity, reverse=True)
 
         # in case of a load, we need to rebuild our Cache.
         if not self.testhulls:
@@ -397,16 +475,16 @@ class ShipDesignCache(object):
                 print "Rebuilt Cache. The following hulls are used in testdesigns for parts: ", self.testhulls
 
         # 1. Update hull test designs
-        print "Updating Testdesigns for hulls..."
         if verbose:
+            print "Updating Testdesigns for hulls..."
             print "Available Hulls: ", available_hulls
             print "Existing Designs (prefix: %s): " % TESTDESIGN_NAME_HULL,
             print [x.replace(TESTDESIGN_NAME_HULL, "") for x in testdesign_names_hull]
-        for hull in [get_hulltype(hullname) for hullname in available_hulls
-                     if "%s_%s" % (TESTDESIGN_NAME_HULL, hullname) not in testdesign_names_hull]:
-            partlist = len(hull.slots) * [""]
-            testdesign_name = "%s_%s" % (TESTDESIGN_NAME_HULL, hull.name)
-            res = fo.issueCreateShipDesignOrder(testdesign_name, "TESTPURPOSE ONLY", hull.name,
+        for hullname in [hullname for hullname in available_hulls
+                         if hull_testdesign_names[hullname] not in testdesign_names_hull]:
+            partlist = len(hull_slots[hullname]) * [""]
+            testdesign_name = hull_testdesign_names[hullname]
+            res = fo.issueCreateShipDesignOrder(testdesign_name, "TESTPURPOSE ONLY", hullname,
                                                 partlist, "", "fighter", False)
             if res:
                 print "Success: Added Test Design %s, with result %d" % (testdesign_name, res)
@@ -415,18 +493,21 @@ class ShipDesignCache(object):
                 continue
 
         # 2. Cache the list of buildable ship hulls for each planet
-        print "Caching buildable hulls per planet..."
-        testname = "%s_%s" % (TESTDESIGN_NAME_HULL, "%s")
+        if verbose:
+            print "Caching buildable hulls per planet..."
         for pid in planets_with_shipyards:
             self.hulls_for_planets[pid] = []
         for hullname in available_hulls:
-            testdesign = _get_design_by_name(testname % hullname)
+            testdesign = _get_design_by_name(hull_testdesign_names[hullname])
             if testdesign:
                 for pid in planets_with_shipyards:
-                    if _can_build(testdesign, empire_id, pid):
+                    if testdesign.productionLocationForEmpire(empire_id, pid):
                         self.hulls_for_planets[pid].append(hullname)
             else:
                 print "Missing testdesign for hull %s!" % hullname
+        # make sure we do not edit the list later on this turn => tuple: immutable
+        for pid in planets_with_shipyards:
+            self.hulls_for_planets[pid] = tuple(self.hulls_for_planets[pid])
 
         # 3. Update ship part test designs
         #     Because there are different slottypes, we need to find a hull that can host said slot.
@@ -435,17 +516,17 @@ class ShipDesignCache(object):
         #       II. If there are parts, find out which slots we need
         #       III. For each slot type, try to find a hull we can build on this planet
         #            and use this hull for all the parts hostable in this type.
-        print "Updating test designs for ship parts..."
         if verbose:
+            print "Updating test designs for ship parts..."
             print "Available parts: ", available_parts
             print "Existing Designs (prefix: %s): " % TESTDESIGN_NAME_PART,
             print [x.replace(TESTDESIGN_NAME_PART, "") for x in testdesign_names_part]
         for pid in planets_with_shipyards:
             planetname = universe.getPlanet(pid).name
             local_hulls = self.hulls_for_planets[pid]
-            needs_update = [_get_part_type(partname) for partname in available_parts
-                            if not any(["%s_%s_%s" % (TESTDESIGN_NAME_PART, partname, hullname) in testdesign_names_part
-                                       for hullname in local_hulls])]
+            needs_update = [part_types[partname] for partname in available_parts
+                            if not any(part_testdesign_prefixes[partname] + hullname in testdesign_names_part
+                                       for hullname in local_hulls)]
             if not needs_update:
                 if verbose:
                     print "Planet %s: Test designs are up to date" % planetname
@@ -454,7 +535,7 @@ class ShipDesignCache(object):
                 print "Planet %s: The following parts appear to need a new design: " % planetname,
                 print [part.name for part in needs_update]
             for slot in available_slot_types:
-                testhull = next((hullname for hullname in local_hulls if slot in get_hulltype(hullname).slots), None)
+                testhull = next((hullname for hullname in local_hulls if slot in hull_slots[hullname]), None)
                 if testhull is None:
                     if verbose:
                         print "Failure: Could not find a hull with slots of type '%s' for this planet" % slot.name
@@ -463,67 +544,57 @@ class ShipDesignCache(object):
                     if verbose:
                         print "Using hull %s for slots of type '%s'" % (testhull, slot.name)
                     self.testhulls.add(testhull)
-                slotlist = [s for s in get_hulltype(testhull).slots]
+                slotlist = hull_slots[testhull]
                 slot_index = slotlist.index(slot)
                 num_slots = len(slotlist)
                 for part in [part for part in needs_update if slot in part.mountableSlotTypes]:
                     partlist = num_slots * [""]
                     partlist[slot_index] = part.name
-                    testdesign_name = "%s_%s_%s" % (TESTDESIGN_NAME_PART, part.name, testhull)
+                    testdesign_name = part_testdesign_prefixes[part.name] + testhull
                     res = fo.issueCreateShipDesignOrder(testdesign_name, "TESTPURPOSE ONLY", testhull,
                                                         partlist, "", "fighter", False)
                     if res:
                         print "Success: Added Test Design %s, with result %d" % (testdesign_name, res)
-                        testdesign_names_part.append(testdesign_name)
+                        testdesign_names_part.add(testdesign_name)
                     else:
                         print "Failure: Unknown error when adding test design %s" % testdesign_name,
                         print "got result %d but expected 1" % res
                         continue
                     needs_update.remove(part)  # We only need one design per part, not for every possible slot
 
-        #  later on in the code, we will have to check multiple times if the test hulls are in
-        #  the list of buildable hulls for the planet. As the ordering is preserved, move the
-        #  testhulls to the front of the availableHull list to save some time in the checks.
-        for i, s in enumerate(self.testhulls):
-            try:
-                idx = available_hulls.index(s)
-                if i != idx:
-                    available_hulls[i], available_hulls[idx] = available_hulls[idx], available_hulls[i]
-            except ValueError:
-                print "ERROR: hull in testhull cache not in available_hulls",
-                print "eventhough it is supposed to be a proper subset."
-                traceback.print_exc()
-        number_of_testhulls = len(self.testhulls)
+        testhulls = tuple(self.testhulls)  # the testhulls do not change anymore this turn
+        if not self.testhulls.issubset(available_hulls):
+            print "ERROR: hull in testhull cache not in available_hulls",
+            print "eventhough it is supposed to be a proper subset."
 
         # 4. Cache the list of buildable ship parts for each planet
-        print "Caching buildable ship parts per planet..."
+        if verbose:
+            print "Caching buildable ship parts per planet..."
+        testdesigns_for_parts = {}  # {partname: [(testhullname, testdesign)]}, ordered as testhulls
         for pid in planets_with_shipyards:
-            local_testhulls = [hull for hull in self.testhulls
-                               if hull in self.hulls_for_planets[pid][:number_of_testhulls]]
-            self.parts_for_planets[pid] = {}
+            local_hulls = set(self.hulls_for_planets[pid])
             local_ignore = set()
-            local_cache = self.parts_for_planets[pid]
-            for slot in available_slot_types:
-                local_cache[slot] = []
+            local_cache = defaultdict(list)
             for partname in available_parts:
                 if partname in local_ignore:
                     continue
-                ship_design = None
-                for hullname in local_testhulls:
-                    ship_design = _get_design_by_name("%s_%s_%s" % (TESTDESIGN_NAME_PART, partname, hullname))
-                    if ship_design:
-                        if _can_build(ship_design, empire_id, pid):
-                            for slot in _get_part_type(partname).mountableSlotTypes:
-                                local_cache[slot].append(partname)
-                                local_ignore.update(self.strictly_worse_parts[partname])
-                        break
+                if partname not in testdesigns_for_parts:
+                    testdesign_prefix = part_testdesign_prefixes[partname]
+                    testdesigns = [(hullname, _get_design_by_name(testdesign_prefix + hullname))
+                                   for hullname in testhulls if testdesign_prefix + hullname in testdesign_names_part]
+                    testdesigns_for_parts[partname] = [(hullname, design) for hullname, design in testdesigns if design]
+                ship_design = next((design for hullname, design in testdesigns_for_parts[partname]
+                                    if hullname in local_hulls), None)
+                if ship_design and ship_design.productionLocationForEmpire(empire_id, pid):
+                    for slot in part_types[partname].mountableSlotTypes:
+                        local_cache[slot].append(partname)
+                    local_ignore.update(self.strictly_worse_parts[partname])
                 if verbose and not ship_design:
                     planetname = universe.getPlanet(pid).name
                     print "Failure: Couldn't find a testdesign for part %s on planet %s." % (partname, planetname)
             # make sure we do not edit the list later on this turn => tuple: immutable
             # This also allows to shallowcopy the cache.
-            for slot in local_cache:
-                local_cache[slot] = tuple(local_cache[slot])
+            self.parts_for_planets[pid] = {slot: tuple(local_cache.get(slot, ())) for slot in available_slot_types}
 
             if verbose:
                 print "%s: " % universe.getPlanet(pid).name, self.parts_for_planets[pid]
@@ -558,19 +629,19 @@ class AdditionalSpecifications(object):
         """
         self.enemy_shields = enemy[2]
         enemy_attack_stats = enemy[1]
-        self.enemy_weapon_strength = 0
-        for stat in enemy_attack_stats:
-            if stat[0] > self.enemy_weapon_strength:
-                self.enemy_weapon_strength = stat[0]
+        self.enemy_weapon_strength = max([0] + [stat[0] for stat in enemy_attack_stats])
 
     def convert_to_tuple(self):
         """Create a tuple of this class' attributes (e.g. to use as key in dict).
 
         :returns: tuple (minFuel,minSpeed,enemyDmg,enemyShield,enemyMineDmg)
         """
-        return ("minFuel: %s" % self.minimum_fuel, "minSpeed: %s" % self.minimum_speed,
-               "enemyDmg: %s" % self.enemy_weapon_strength, "enemyShields: %s" % self.enemy_shields,
-               "enemyMineDmg: %s" % self.enemy_mine_dmg)
+        return (self.minimum_fuel, self.minimum_speed, self.enemy_weapon_strength, self.enemy_shields,
+                self.enemy_mine_dmg)
+
+    def __str__(self):
+        """Return the requirements in a human readable form."""
+        return REQUIREMENTS_TEMPLATE % self.convert_to_tuple()
 
 
 class ShipDesigner(object):
@@ -594,6 +665,10 @@ class ShipDesigner(object):
 
     For improved performance, maybe override _filling_algorithm() with a more specialised algorithm as well.
     """
+    __slots__ = ('species', 'hull', 'partnames', 'parts', 'attacks', 'structure', 'shields', 'fuel', 'speed',
+                 'stealth', 'detection', 'troops', 'colonisation', 'production_cost', 'production_time', 'pid',
+                 'additional_specifications', 'design_name_dict', 'design_name_thresholds',
+                 'design_names', 'weighted_attacks')
     basename = "Default - Do not build"     # base design name
     description = "Base class Ship type"    # design description
     useful_part_classes = ALL_META_CLASSES  # only these parts are considered in the design process
@@ -602,8 +677,7 @@ class ShipDesigner(object):
     filter_inefficient_parts = False        # removes cost-inefficient parts (less capacity and less capacity/cost)
 
     NAMETABLE = "AI_SHIPDESIGN_NAME_INVALID"
-    NAME_THRESHOLDS = []                    # list of rating thresholds to choose a different name
-    design_name_dict = {}                   # {min_rating: basename}: based on rating, the highest unlocked name is used
+    NAME_THRESHOLDS = ()                    # ascending rating thresholds to choose a different name
     running_index = {}                      # {basename: int}: a running index per design name
 
     def __init__(self):
@@ -625,8 +699,23 @@ class ShipDesigner(object):
         self.production_time = 1
         self.pid = -1               # planetID for checks on production cost if not LocationInvariant.
         self.additional_specifications = AdditionalSpecifications()
-        self.design_name_dict = {k: v for k, v in zip(self.NAME_THRESHOLDS,
-                                                      UserString(self.NAMETABLE, self.basename).split())}
+        self.design_name_dict = self._get_design_name_dict()  # {min_rating: basename}, cf. _build_design_name()
+        self.design_name_thresholds = tuple(sorted(self.design_name_dict))  # ascending min_ratings
+        self.design_names = tuple(self.design_name_dict[threshold] for threshold in self.design_name_thresholds)
+        self.weighted_attacks = {}  # {(weapons_grade, frozenset(attacks.items())): weighted attacks}
+
+    @classmethod
+    def _get_design_name_dict(cls):
+        """Return the design_name_dict of the class.
+
+        The names are read from the stringtable only once per class instead of once per instance.
+
+        :return: dict {min_rating: basename}
+        """
+        if "_cached_design_name_dict" not in cls.__dict__:  # do not pick up the cache of a parent class
+            cls._cached_design_name_dict = {k: v for k, v in zip(cls.NAME_THRESHOLDS,
+                                                                 UserString(cls.NAMETABLE, cls.basename).split())}
+        return cls._cached_design_name_dict
 
     def evaluate(self):
         """ Return a rating for the design.
@@ -636,21 +725,25 @@ class ShipDesigner(object):
 
         :returns: float - rating of the current part/hull combo
         """
-        self.update_stats()
+        # The piloting species does not affect the requirements checked below,
+        # so only apply its modifiers if the design meets the requirements.
+        self.update_stats(ignore_species=True)
         rating = 0
 
         # If we do not meet the requirements, we want to return a negative rating.
         # However, we also need to make sure, that the closer we are to requirements,
         # the better our rating is so the optimizing heuristic finds "the right way".
-        if self.fuel < self.additional_specifications.minimum_fuel:
-            rating += MISSING_REQUIREMENT_MULTIPLIER * (self.additional_specifications.minimum_fuel - self.fuel)
-        if self.speed < self.additional_specifications.minimum_speed:
-            rating += MISSING_REQUIREMENT_MULTIPLIER * (self.additional_specifications.minimum_speed - self.speed)
-        if self.structure < self.additional_specifications.minimum_structure:
-            rating += MISSING_REQUIREMENT_MULTIPLIER * (self.additional_specifications.minimum_structure - self.structure)
+        specs = self.additional_specifications
+        if self.fuel < specs.minimum_fuel:
+            rating += MISSING_REQUIREMENT_MULTIPLIER * (specs.minimum_fuel - self.fuel)
+        if self.speed < specs.minimum_speed:
+            rating += MISSING_REQUIREMENT_MULTIPLIER * (specs.minimum_speed - self.speed)
+        if self.structure < specs.minimum_structure:
+            rating += MISSING_REQUIREMENT_MULTIPLIER * (specs.minimum_structure - self.structure)
         if rating < 0:
             return rating
         else:
+            self._apply_species_modifiers()
             return self._rating_function()
 
     def _rating_function(self):
@@ -666,7 +759,7 @@ class ShipDesigner(object):
 
         Call this if design is invalid to avoid miscalculation of ratings."""
         self.structure = 0
-        self.attacks.clear()
+        self.attacks = {}
         self.shields = 0
         self.fuel = 0.0001
         self.speed = 0.0001
@@ -683,7 +776,7 @@ class ShipDesigner(object):
         :param hullname:
         :type hullname: str
         """
-        self.hull = fo.getHullType(hullname)
+        self.hull = _get_hull_type(hullname)
 
     def update_parts(self, partname_list):
         """Set both partnames and parts attributes.
@@ -718,70 +811,70 @@ class ShipDesigner(object):
         local_time_cache = Cache.production_time[self.pid]
 
         # read out hull stats
-        self.structure = self.hull.structure
-        self.fuel = self.hull.fuel
-        self.speed = self.hull.speed
         self.stealth = self.hull.stealth
-        self.attacks.clear()
+        self.attacks = {}  # a new dict as the old one may be shared with self.weighted_attacks
         self.detection = 0  # TODO: Add self.hull.detection once available in interface
         self.shields = 0    # TODO: Add self.hull.shields if added to interface
-        self.troops = 0     # TODO: Add self.hull.troops if added to interface
-        self.production_cost = local_cost_cache[self.hull.name]
-        self.production_time = local_time_cache[self.hull.name]
         self.colonisation = -1  # -1 as 0 corresponds to outpost pod (capacity = 0)
-
-        # read out part stats
-        shield_counter = cloak_counter = detection_counter = colonization_counter = 0  # to deal with Non-stacking parts
+        # TODO: Add self.hull.troops to the troops entry if added to interface
+        stacking_totals = {FUEL: self.hull.fuel, ENGINES: self.hull.speed, ARMOUR: self.hull.structure, TROOPS: 0}
+
+        # production cost and time of hull and parts, looked up by the partnames instead of the part objects' names
+        partnames = [partname for partname in self.partnames if partname]
+        self.production_cost = sum([local_cost_cache[partname] for partname in partnames],
+                                   local_cost_cache[self.hull.name])
+        self.production_time = max([local_time_cache[partname] for partname in partnames]
+                                   + [local_time_cache[self.hull.name]])
+
+        # read out part stats: sum up the stacking parts per meta class and count the non-stacking ones
+        non_stacking_counts = Counter()
+        non_stacking_capacities = {}
         for part in self.parts:
-            self.production_cost += local_cost_cache[part.name]
-            self.production_time = max(self.production_time, local_time_cache[part.name])
-            partclass = part.partClass
+            meta_class = META_CLASS_BY_PART_CLASS.get(part.partClass)
             capacity = part.capacity
-            if partclass in FUEL:
-                self.fuel += capacity
-            elif partclass in ENGINES:
-                self.speed += capacity
-            elif partclass in COLONISATION:
-                colonization_counter += 1
-                if colonization_counter == 1:
-                    self.colonisation = capacity
-                else:
-                    self.colonisation = -1
-            elif partclass in DETECTION:
-                detection_counter += 1
-                if detection_counter == 1:
-                    self.detection += capacity
-                else:
-                    self.detection = 0
-            elif partclass in ARMOUR:
-                self.structure += capacity
-            elif partclass in WEAPONS:
-                if capacity in self.attacks:
-                    self.attacks[capacity] += 1
-                else:
-                    self.attacks[capacity] = 1
-            elif partclass in SHIELDS:
-                shield_counter += 1
-                if shield_counter == 1:
-                    self.shields = capacity
-                else:
-                    self.shields = 0
-            elif partclass in TROOPS:
-                self.troops += capacity
-            elif partclass in STEALTH:
-                cloak_counter += 1
-                if cloak_counter == 1:
-                    self.stealth += capacity
-                else:
-                    self.stealth = 0
+            if meta_class in stacking_totals:
+                stacking_totals[meta_class] += capacity
+            elif meta_class is WEAPONS:
+                self.attacks[capacity] = self.attacks.get(capacity, 0) + 1
+            elif meta_class is not None:
+                non_stacking_counts[meta_class] += 1
+                non_stacking_capacities[meta_class] = capacity
             # TODO: (Hardcode?) extra effect modifiers such as the transspatial drive or multispectral shields, ...
-
-        if self.species and not ignore_species:
+        self.fuel = stacking_totals[FUEL]
+        self.speed = stacking_totals[ENGINES]
+        self.structure = stacking_totals[ARMOUR]
+        self.troops = stacking_totals[TROOPS]
+
+        # non-stacking parts only have an effect if there is exactly one of them
+        if non_stacking_counts:
+            if COLONISATION in non_stacking_counts:
+                self.colonisation = (non_stacking_capacities[COLONISATION]
+                                     if non_stacking_counts[COLONISATION] == 1 else -1)
+            if DETECTION in non_stacking_counts:
+                self.detection = non_stacking_capacities[DETECTION] if non_stacking_counts[DETECTION] == 1 else 0
+            if SHIELDS in non_stacking_counts:
+                self.shields = non_stacking_capacities[SHIELDS] if non_stacking_counts[SHIELDS] == 1 else 0
+            if STEALTH in non_stacking_counts:
+                self.stealth = (self.stealth + non_stacking_capacities[STEALTH]
+                                if non_stacking_counts[STEALTH] == 1 else 0)
+
+        if not ignore_species:
+            self._apply_species_modifiers()
+
+    def _apply_species_modifiers(self):
+        """Modify the stats of the design according to the piloting grades of the species.
+
+        To be called once after update_stats(ignore_species=True).
+        """
+        if self.species:
             # TODO: Add troop modifiers once added
             weapons_grade, shields_grade = foAI.foAIstate.get_piloting_grades(self.species)
             self.shields = foAI.foAIstate.weight_shields(self.shields, shields_grade)
             if self.attacks:
-                self.attacks = foAI.foAIstate.weight_attacks(self.attacks, weapons_grade)
+                key = (weapons_grade, frozenset(self.attacks.iteritems()))
+                if key not in self.weighted_attacks:
+                    self.weighted_attacks[key] = foAI.foAIstate.weight_attacks(self.attacks, weapons_grade)
+                self.attacks = self.weighted_attacks[key]
 
     def add_design(self, verbose=False):
         """Add a real (i.e. gameobject) ship design of the current configuration.
@@ -883,14 +976,12 @@ class ShipDesigner(object):
                 print "Evaluating planet %s" % planet.name
                 print "Species:", planet.speciesName
                 print "Available Ship Hulls: ", available_hulls
-            available_parts = copy.copy(Cache.parts_for_planets[pid])  # this is a dict! {slottype:(partnames)}
-            for slot in available_parts:
-                available_parts[slot] = list(available_parts[slot])
+            # mutable copy of the cached {slottype: (partnames)} as _filter_parts() modifies the lists
+            available_parts = {slot: list(partnames) for slot, partnames in Cache.parts_for_planets[pid].iteritems()}
             self._filter_parts(available_parts, verbose=verbose)
-            all_parts = []
-            for partlist in available_parts.values():
-                all_parts += partlist
-            design_cache_parts = design_cache_species.setdefault(frozenset(all_parts), {})
+            # frozenset as the key must not depend on the order of the slottypes
+            parts_key = frozenset().union(*available_parts.values())
+            design_cache_parts = design_cache_species.setdefault(parts_key, {})
             best_rating_for_planet = 0
             best_hull = None
             best_parts = None
@@ -966,24 +1057,31 @@ class ShipDesigner(object):
                     partclass = tup[1].partClass
                     if partclass in check_for_redundance:
                         partclass_dict[partclass].append(tup[1])
+                removed_parts = set()
                 for shipPartsPerClass in partclass_dict.itervalues():
-                    for a in shipPartsPerClass:
+                    if len(shipPartsPerClass) == 1:  # nothing to compare with, only check the capacity
+                        a = shipPartsPerClass[0]
                         if a.capacity == 0:  # TODO: Modify this if effects of items get hardcoded
-                            part_dict[slottype].remove((a.name, a))
+                            removed_parts.add(a.name)
+                            if verbose:
+                                print "removing %s because capacity is zero." % a.name
+                        continue
+                    part_stats = [(part, part.capacity, part.capacity/local_cost_cache[part.name])
+                                  for part in shipPartsPerClass]
+                    for a, capacity_a, efficiency_a in part_stats:
+                        if capacity_a == 0:  # TODO: Modify this if effects of items get hardcoded
+                            removed_parts.add(a.name)
                             if verbose:
                                 print "removing %s because capacity is zero." % a.name
                             continue
-                        if len(shipPartsPerClass) == 1:
-                            break
-                        cost_a = local_cost_cache[a.name]
-                        for b in shipPartsPerClass:
-                            if (b is not a
-                                    and (b.capacity/local_cost_cache[b.name] - a.capacity/cost_a) > -1e-6
-                                    and b.capacity >= a.capacity):
+                        for b, capacity_b, efficiency_b in part_stats:
+                            if b is not a and efficiency_b - efficiency_a > -1e-6 and capacity_b >= capacity_a:
                                 if verbose:
                                     print "removing %s because %s is better." % (a.name, b.name)
-                                part_dict[slottype].remove((a.name, a))
+                                removed_parts.add(a.name)
                                 break
+                if removed_parts:
+                    part_dict[slottype] = [tup for tup in part_dict[slottype] if tup[0] not in removed_parts]
         for slottype in part_dict:
             partname_dict[slottype] = [tup[0] for tup in part_dict[slottype]]
         self._class_specific_filter(partname_dict)
@@ -1040,40 +1138,51 @@ class ShipDesigner(object):
         :param available_parts: dict, indexed by slottype, containing a list of partnames for the slot
         :return: best rating, corresponding list of partnames
         """
-        number_of_slots_by_slottype = Counter()
-        for slot in self.hull.slots:
-            number_of_slots_by_slottype[slot] += 1
+        hull_slots = self.hull.slots
+        number_of_slots_by_slottype = Counter(hull_slots)
         parts = {}                # indexed by slottype, contains list of partnames (list of strings)
         total_filling = {}        # indexed by slottype, contains the number of parts (ordered as in parts)
         for slot in number_of_slots_by_slottype:
             parts[slot] = available_parts[slot] + [""]
             total_filling[slot] = self._starting_guess(available_parts[slot], number_of_slots_by_slottype[slot])
-        last_changed_slottype = None
-        exit_outer_loop = False
-        while True:
+
+        # The rating only depends on the parts used, not on their order.
+        rating_cache = {}  # {filling of all slottypes: rating}
+        slottypes = list(number_of_slots_by_slottype)  # fixed order of the slottypes in the rating_cache keys
+
+        def get_rating(filling, other_parts, slot_parts, slot_filling):
+            """Return the rating of the design, building its partlist only if not rated before."""
+            if filling not in rating_cache:
+                partlist = list(other_parts)
+                for partname, count in zip(slot_parts, slot_filling):
+                    partlist += count * [partname]
+                self.update_parts(partlist)
+                rating_cache[filling] = self.evaluate()
+            return rating_cache[filling]
+
+        # Slottypes which need to be (re-)optimized. If the filling of a slottype changes,
+        # the other slottypes need to be checked again as the new parts can affect the value of their parts.
+        dirty_slottypes = set(slottypes)
+        while dirty_slottypes:
             # Try to optimize each slottype iteratively until no more improvement.
-            if exit_outer_loop:
-                break
-            for slot in number_of_slots_by_slottype:
-                if last_changed_slottype is None:  # first run of the loop
-                    last_changed_slottype = slot
-                elif slot == last_changed_slottype:
-                    exit_outer_loop = True
-                    break
+            for slot_index, slot in enumerate(slottypes):
+                if slot not in dirty_slottypes:
+                    continue
+                dirty_slottypes.remove(slot)
                 current_filling = total_filling[slot]
+                slot_parts = parts[slot]
+                # Only the filling of the current slottype changes below, so build the rest of the keys only once.
+                fillings_before = tuple(tuple(total_filling[s]) for s in slottypes[:slot_index])
+                fillings_after = tuple(tuple(total_filling[s]) for s in slottypes[slot_index+1:])
                 num_parts = len(current_filling)
                 range_parts = range(num_parts)
-                current_parts = []
                 other_parts = []
                 for s in number_of_slots_by_slottype:
-                    if s is slot:
-                        for j in range_parts:
-                            current_parts += current_filling[j] * [parts[s][j]]
-                    else:
+                    if s is not slot:
                         for j in xrange(len(total_filling[s])):
                             other_parts += total_filling[s][j] * [parts[s][j]]
-                self.update_parts(other_parts+current_parts)
-                current_rating = self.evaluate()
+                current_rating = get_rating(fillings_before + (tuple(current_filling),) + fillings_after,
+                                            other_parts, slot_parts, current_filling)
                 last_changed = None
                 exit_loop = False
                 while not exit_loop:
@@ -1089,17 +1198,18 @@ class ShipDesigner(object):
                             if j == i:
                                 continue
                             while current_filling[j] > 0:
-                                current_parts[current_parts.index(parts[slot][j])] = parts[slot][i]  # exchange parts
-                                self.update_parts(other_parts+current_parts)
-                                new_rating = self.evaluate()
+                                current_filling[j] -= 1  # exchange parts
+                                current_filling[i] += 1
+                                new_rating = get_rating(fillings_before + (tuple(current_filling),) + fillings_after,
+                                                        other_parts, slot_parts, current_filling)
                                 if new_rating > current_rating:  # keep the new config as it is better.
-                                    current_filling[j] -= 1
-                                    current_filling[i] += 1
                                     current_rating = new_rating
                                     last_changed = i
-                                    last_changed_slottype = slot
+                                    dirty_slottypes.update(slottypes)
+                                    dirty_slottypes.remove(slot)
                                 else:  # undo the change as the rating is worse, try next part.
-                                    current_parts[current_parts.index(parts[slot][i])] = parts[slot][j]
+                                    current_filling[j] += 1
+                                    current_filling[i] -= 1
                                     break
         # rebuild the partlist in the order of the slots of the hull
         partlist = []
@@ -1108,7 +1218,7 @@ class ShipDesigner(object):
             slot_filling[slot] = []
             for j in xrange(len(total_filling[slot])):
                 slot_filling[slot] += total_filling[slot][j] * [parts[slot][j]]
-        for slot in self.hull.slots:
+        for slot in hull_slots:
             partlist.append(slot_filling[slot].pop())
         self.update_parts(partlist)
         rating = self.evaluate()
@@ -1129,20 +1239,15 @@ class ShipDesigner(object):
 
         :return: summed up damage vs shielded enemy
         """
-        total_dmg = 0
-        for dmg, count in self.attacks.items():
-            total_dmg += max(0, dmg - self.additional_specifications.enemy_shields)*count
-        return total_dmg
+        enemy_shields = self.additional_specifications.enemy_shields
+        return sum(max(0, dmg - enemy_shields)*count for dmg, count in self.attacks.iteritems())
 
     def _total_dmg(self):
         """Sum up and return the damage of all weapon parts.
 
         :return: Total damage of the design (against no shields)
         """
-        total_dmg = 0
-        for dmg, count in self.attacks.items():
-            total_dmg += dmg*count
-        return total_dmg
+        return sum(dmg*count for dmg, count in self.attacks.iteritems())
 
     def _build_design_name(self):
         """Build the ingame design name.
@@ -1155,16 +1260,16 @@ class ShipDesigner(object):
         empire_name = fo.getEmpire().name.upper()
         empire_initials = empire_name[:1] + empire_name[-1:]
         rating = self._calc_rating_for_name()
-        basename = next((name for (maxRating, name) in sorted(self.design_name_dict.items(), reverse=True)
-                        if rating > maxRating), self.__class__.basename)
+        # use the name of the highest threshold below the rating
+        idx = bisect_left(self.design_name_thresholds, rating)
+        basename = self.design_names[idx - 1] if idx else self.__class__.basename
 
-        def design_name():
-            """return the design name based on the name_template"""
-            return name_template % (empire_initials, basename, self.running_index[basename])
-        self.__class__.running_index.setdefault(basename, 1)
-        while _get_design_by_name(design_name()):
-            self.__class__.running_index[basename] += 1
-        return design_name()
+        running_index = self.__class__.running_index
+        index = running_index.setdefault(basename, 1)
+        while _get_design_by_name(name_template % (empire_initials, basename, index)):
+            index += 1
+        running_index[basename] = index
+        return name_template % (empire_initials, basename, index)
 
     def _calc_rating_for_name(self):
         """Return a rough rating for the design independent of special requirements and species.
@@ -1186,6 +1291,7 @@ class MilitaryShipDesigner(ShipDesigner):
     Overrides _rating_function()
     Overrides _starting_guess()
     """
+    __slots__ = ()
     basename = "Warship"
     description = "Military Ship"
     useful_part_classes = ARMOUR | WEAPONS | SHIELDS | FUEL | ENGINES
@@ -1193,8 +1299,8 @@ class MilitaryShipDesigner(ShipDesigner):
     filter_inefficient_parts = True
 
     NAMETABLE = "AI_SHIPDESIGN_NAME_MILITARY"
-    NAME_THRESHOLDS = sorted([0, 100, 250, 500, 1000, 2500, 5000, 7500, 10000,
-                              15000, 20000, 25000, 30000, 35000, 40000, 45000, 50000, 60000])
+    NAME_THRESHOLDS = (0, 100, 250, 500, 1000, 2500, 5000, 7500, 10000,
+                       15000, 20000, 25000, 30000, 35000, 40000, 45000, 50000, 60000)
 
     def __init__(self):
         ShipDesigner.__init__(self)
@@ -1203,13 +1309,14 @@ class MilitaryShipDesigner(ShipDesigner):
 
     def _rating_function(self):
         # TODO: Find a better way to determine the value of speed and fuel
-        enemy_dmg = self.additional_specifications.enemy_weapon_strength
+        specs = self.additional_specifications
+        enemy_dmg = specs.enemy_weapon_strength
         total_dmg = max(self._total_dmg_vs_shields(), 0.1)
         shield_factor = max(enemy_dmg / max(0.01, enemy_dmg - self.shields), 1)
         effective_structure = self.structure * shield_factor
         speed_factor = 1 + 0.003*(self.speed - 85)
-        fuel_factor = 1 + 0.03 * (self.fuel - self.additional_specifications.minimum_fuel) ** 0.5
-        return max(total_dmg, 0.1) * effective_structure * speed_factor * fuel_factor / self.production_cost
+        fuel_factor = 1 + 0.03 * (self.fuel - specs.minimum_fuel) ** 0.5
+        return total_dmg * effective_structure * speed_factor * fuel_factor / self.production_cost
 
     def _starting_guess(self, available_parts, num_slots):
         # for military ships, our primary rating function is given by
@@ -1224,22 +1331,25 @@ class MilitaryShipDesigner(ShipDesigner):
         # As this is a simple rational function in n, the maximizing problem can be solved analytically.
         # The analytical solution (after rounding to the nearest integer)is a good starting guess for our best design.
         ret_val = (len(available_parts)+1)*[0]
-        parts = [_get_part_type(part) for part in available_parts]
-        weapons = [part for part in parts if part.partClass in WEAPONS]
-        armours = [part for part in parts if part.partClass in ARMOUR]
-        cap = lambda x: x.capacity
+        parts_by_meta_class = defaultdict(list)  # {meta_class: [(index in available_parts, part)]}
+        for idx, part in enumerate(map(_get_part_type, available_parts)):
+            parts_by_meta_class[META_CLASS_BY_PART_CLASS.get(part.partClass)].append((idx, part))
+        weapons = parts_by_meta_class[WEAPONS]
+        armours = parts_by_meta_class[ARMOUR]
+        cap = lambda x: x[1].capacity
         if weapons:
-            weapon = max(weapons, key=cap).name
-            idxweapon = available_parts.index(weapon)
-            cw = Cache.production_cost[self.pid][weapon]
+            local_cost_cache = Cache.production_cost[self.pid]
+            idxweapon = max(weapons, key=cap)[0]
+            cw = local_cost_cache[available_parts[idxweapon]]
             if armours:
-                armour = max(armours, key=cap).name
-                idxarmour = available_parts.index(armour)
-                a = _get_part_type(armour).capacity
-                ca = Cache.production_cost[self.pid][armour]
+                idxarmour, armour_part = max(armours, key=cap)
+                a = armour_part.capacity
+                ca = local_cost_cache[available_parts[idxarmour]]
+                hull = self.hull
+                hullname = hull.name
                 s = num_slots
-                h = self.hull.structure
-                ch = Cache.production_cost[self.pid][self.hull.name]
+                h = hull.structure
+                ch = local_cost_cache[hullname]
                 p1 = a*s*ca + a*ch
                 p2 = math.sqrt(a * (ca*s + ch) * (a*s*cw+a*ch+h*cw-h*ca))
                 p3 = a*(ca-cw)
@@ -1247,14 +1357,13 @@ class MilitaryShipDesigner(ShipDesigner):
                 n = int(round(n))
                 n = max(n, 1)
                 n = min(n, s)
-                print "estimated weapon slots for %s: %d" % (self.hull.name, n)
+                print "estimated weapon slots for %s: %d" % (hullname, n)
                 ret_val[idxarmour] = s-n
                 ret_val[idxweapon] = n
             else:
                 ret_val[idxweapon] = num_slots
         elif armours:
-            armour = max(armours, key=cap).name
-            idxarmour = available_parts.index(armour)
+            idxarmour = max(armours, key=cap)[0]
             ret_val[idxarmour] = num_slots
         else:
             ret_val[-1] = num_slots
@@ -1273,6 +1382,7 @@ class TroopShipDesignerBaseClass(ShipDesigner):
     Overrides _starting_guess()
     Overrides _class_specific_filter
     """
+    __slots__ = ()
     basename = "Troopers (Do not build me)"
     description = "Trooper."
     useful_part_classes = TROOPS
@@ -1291,16 +1401,12 @@ class TroopShipDesignerBaseClass(ShipDesigner):
 
     def _starting_guess(self, available_parts, num_slots):
         # fill completely with biggest troop pods. If none are available for this slot type, leave empty.
-        troop_pods = [_get_part_type(part) for part in available_parts if _get_part_type(part).partClass in TROOPS]
+        parts = [_get_part_type(part) for part in available_parts]
+        troop_pods = [(idx, part) for idx, part in enumerate(parts) if part.partClass in TROOPS]
         ret_val = (len(available_parts)+1)*[0]
         if troop_pods:
-            cap = lambda x: x.capacity
-            biggest_troop_pod = max(troop_pods, key=cap).name
-            try:  # we could use an if-check here but since we usually have troop pods for the slot, try is faster
-                idx = available_parts.index(biggest_troop_pod)
-            except ValueError:
-                idx = len(available_parts)
-                traceback.print_exc()
+            cap = lambda x: x[1].capacity
+            idx = max(troop_pods, key=cap)[0]  # index of the biggest troop pod
         else:
             idx = len(available_parts)
         ret_val[idx] = num_slots
@@ -1317,12 +1423,13 @@ class OrbitalTroopShipDesigner(TroopShipDesignerBaseClass):
 
     Extends __init__()
     """
+    __slots__ = ()
     basename = "SpaceInvaders"
     description = "Ship designed for local invasions of enemy planets"
 
     useful_part_classes = TROOPS
     NAMETABLE = "AI_SHIPDESIGN_NAME_TROOPER_ORBITAL"
-    NAME_THRESHOLDS = sorted([0])
+    NAME_THRESHOLDS = (0,)
 
     def __init__(self):
         TroopShipDesignerBaseClass.__init__(self)
@@ -1335,11 +1442,12 @@ class StandardTroopShipDesigner(TroopShipDesignerBaseClass):
 
     Extends __init__()
     """
+    __slots__ = ()
     basename = "StormTroopers"
     description = "Ship designed for the invasion of enemy planets"
     useful_part_classes = TROOPS
     NAMETABLE = "AI_SHIPDESIGN_NAME_TROOPER_STANDARD"
-    NAME_THRESHOLDS = sorted([0])
+    NAME_THRESHOLDS = (0,)
 
     def __init__(self):
         TroopShipDesignerBaseClass.__init__(self)
@@ -1355,6 +1463,7 @@ class ColonisationShipDesignerBaseClass(ShipDesigner):
     Overrides _starting_guess()
     Overrides _class_specific_filter()
     """
+    __slots__ = ()
     basename = "Seeder (Do not build me!)"
     description = "Unarmed Colony Ship"
     useful_part_classes = FUEL | COLONISATION | ENGINES | DETECTION
@@ -1375,12 +1484,13 @@ class ColonisationShipDesignerBaseClass(ShipDesigner):
         ret_val = (len(available_parts)+1)*[0]
         if num_slots == 0:
             return ret_val
-        parts = [_get_part_type(part) for part in available_parts]
-        colo_parts = [part for part in parts if part.partClass in COLONISATION and part.capacity > 0]
-        if colo_parts:
-            colo_part = max(colo_parts, key=lambda x: x.capacity)
-            idx = available_parts.index(colo_part.name)
-            ret_val[idx] = 1
+        best_capacity, best_idx = 0, None
+        for idx, partname in enumerate(available_parts):
+            part = _get_part_type(partname)
+            if part.partClass in COLONISATION and part.capacity > best_capacity:
+                best_capacity, best_idx = part.capacity, idx
+        if best_idx is not None:
+            ret_val[best_idx] = 1
             ret_val[-1] = num_slots - 1
         else:
             ret_val[-1] = num_slots
@@ -1389,10 +1499,12 @@ class ColonisationShipDesignerBaseClass(ShipDesigner):
     def _class_specific_filter(self, partname_dict):
         # remove outpost pods
         for slot in partname_dict:
-            parts = [_get_part_type(part) for part in partname_dict[slot]]
-            for part in parts:
-                if part.partClass in COLONISATION and part.capacity == 0:
-                    partname_dict[slot].remove(part.name)
+            remaining_parts = []
+            for partname in partname_dict[slot]:
+                part = _get_part_type(partname)
+                if not (part.partClass in COLONISATION and part.capacity == 0):
+                    remaining_parts.append(partname)
+            partname_dict[slot] = remaining_parts
 
 
 class StandardColonisationShipDesigner(ColonisationShipDesignerBaseClass):
@@ -1400,11 +1512,12 @@ class StandardColonisationShipDesigner(ColonisationShipDesignerBaseClass):
 
     Extends __init__()
     """
+    __slots__ = ()
     basename = "Seeder"
     description = "Unarmed ship designed for the colonisation of distant planets"
     useful_part_classes = FUEL | COLONISATION | ENGINES | DETECTION
     NAMETABLE = "AI_SHIPDESIGN_NAME_COLONISATION_STANDARD"
-    NAME_THRESHOLDS = sorted([0])
+    NAME_THRESHOLDS = (0,)
 
     def __init__(self):
         ColonisationShipDesignerBaseClass.__init__(self)
@@ -1418,11 +1531,12 @@ class OrbitalColonisationShipDesigner(ColonisationShipDesignerBaseClass):
     Extends __init__()
     Overrides _rating_function()
     """
+    __slots__ = ()
     basename = "Orbital Seeder"
     description = "Unarmed ship designed for the colonisation of local planets"
     useful_part_classes = COLONISATION
     NAMETABLE = "AI_SHIPDESIGN_NAME_COLONISATION_ORBITAL"
-    NAME_THRESHOLDS = sorted([0])
+    NAME_THRESHOLDS = (0,)
 
     def __init__(self):
         ColonisationShipDesignerBaseClass.__init__(self)
@@ -1443,6 +1557,7 @@ class OutpostShipDesignerBaseClass(ShipDesigner):
     Overrides _starting_guess()
     Overrides _class_specific_filter()
     """
+    __slots__ = ()
     basename = "Outposter (do not build me!)"
     description = "Unarmed Outposter Ship"
     useful_part_classes = COLONISATION | FUEL | ENGINES | DETECTION
@@ -1461,23 +1576,24 @@ class OutpostShipDesignerBaseClass(ShipDesigner):
     def _class_specific_filter(self, partname_dict):
         # filter all colo pods
         for slot in partname_dict:
-            parts = [_get_part_type(part) for part in partname_dict[slot]]
-            for part in parts:
-                if part.partClass in COLONISATION and part.capacity != 0:
-                    partname_dict[slot].remove(part.name)
+            remaining_parts = []
+            for partname in partname_dict[slot]:
+                part = _get_part_type(partname)
+                if not (part.partClass in COLONISATION and part.capacity != 0):
+                    remaining_parts.append(partname)
+            partname_dict[slot] = remaining_parts
 
     def _starting_guess(self, available_parts, num_slots):
         # use one outpost pod as starting guess
         ret_val = (len(available_parts)+1)*[0]
         if num_slots == 0:
             return ret_val
-        parts = [_get_part_type(part) for part in available_parts]
-        colo_parts = [part for part in parts if part.partClass in COLONISATION and part.capacity == 0]
-        if colo_parts:
-            colo_part = colo_parts[0]
-            idx = available_parts.index(colo_part.name)
-            ret_val[idx] = 1
-            ret_val[-1] = num_slots - 1
+        for idx, partname in enumerate(available_parts):
+            part = _get_part_type(partname)
+            if part.partClass in COLONISATION and part.capacity == 0:
+                ret_val[idx] = 1
+                ret_val[-1] = num_slots - 1
+                break
         else:
             ret_val[-1] = num_slots
         return ret_val
@@ -1489,13 +1605,14 @@ class OrbitalOutpostShipDesigner(OutpostShipDesignerBaseClass):
     Extends __init__()
     Overrides _rating_function()
     """
+    __slots__ = ()
     basename = "OrbitalOutposter"
     description = "Unarmed ship designed for founding local outposts"
     useful_part_classes = COLONISATION
     filter_useful_parts = True
     filter_inefficient_parts = False
     NAMETABLE = "AI_SHIPDESIGN_NAME_OUTPOSTER_ORBITAL"
-    NAME_THRESHOLDS = sorted([0])
+    NAME_THRESHOLDS = (0,)
 
     def __init__(self):
         OutpostShipDesignerBaseClass.__init__(self)
@@ -1513,11 +1630,12 @@ class StandardOutpostShipDesigner(OutpostShipDesignerBaseClass):
 
     Extends __init__()
     """
+    __slots__ = ()
     basename = "Outposter"
     description = "Unarmed ship designed for founding distant outposts"
     useful_part_classes = COLONISATION | FUEL | ENGINES | DETECTION
     NAMETABLE = "AI_SHIPDESIGN_NAME_OUTPOSTER_STANDARD"
-    NAME_THRESHOLDS = sorted([0])
+    NAME_THRESHOLDS = (0,)
 
     def __init__(self):
         OutpostShipDesignerBaseClass.__init__(self)
@@ -1531,11 +1649,12 @@ class OrbitalDefenseShipDesigner(ShipDesigner):
     Extends __init__()
     Overrides _rating_function()
     """
+    __slots__ = ()
     basename = "Decoy"
     description = "Orbital Defense Ship"
     useful_part_classes = WEAPONS | ARMOUR
     NAMETABLE = "AI_SHIPDESIGN_NAME_ORBITAL_DEFENSE"
-    NAME_THRESHOLDS = sorted([0, 1])
+    NAME_THRESHOLDS = (0, 1)
 
     filter_useful_parts = True
     filter_inefficient_parts = True
@@ -1556,11 +1675,12 @@ class OrbitalDefenseShipDesigner(ShipDesigner):
 
 class ScoutShipDesigner(ShipDesigner):
     """Scout ship class"""
+    __slots__ = ()
     basename = "Scout"
     description = "For exploration and reconnaissance"
     useful_part_classes = DETECTION | FUEL
     NAMETABLE = "AI_SHIPDESIGN_NAME_SCOUT"
-    NAME_THRESHOLDS = sorted([0])
+    NAME_THRESHOLDS = (0,)
     filter_useful_parts = True
     filter_inefficient_parts = True
 
@@ -1596,11 +1716,12 @@ def _get_design_by_name(design_name):
         design = fo.getShipDesign(Cache.design_id_by_name[design_name])
         return design
     else:
-        design = None
-        for ID in fo.getEmpire().allShipDesigns:
-            if fo.getShipDesign(ID).name(False) == design_name:
-                design = fo.getShipDesign(ID)
-                break
+        # look up the name in the index of all designs instead of asking each design for its name
+        Cache.update_all_design_id_by_name()
+        design_id = Cache.all_design_id_by_name.get(design_name)
+        if design_id is None:
+            return None
+        design = fo.getShipDesign(design_id)
         if design:
             Cache.design_id_by_name[design_name] = design.id
         return design
@@ -1614,16 +1735,34 @@ def _get_part_type(partname):
     :param partname: string
     :returns:        partType object
     """
-    if partname in Cache.part_by_partname:
-        return Cache.part_by_partname[partname]
-    else:
+    parttype = Cache.part_by_partname.get(partname)
+    if parttype is None:
         parttype = fo.getPartType(partname)
         if parttype:
             Cache.part_by_partname[partname] = parttype
-            return Cache.part_by_partname[partname]
         else:
             print "FAILURE: Could not find part", partname
             return None
+    return parttype
+
+
+def _get_hull_type(hullname):
+    """Return the hullType object (fo.getHullType(hullname)) of the given hullname.
+
+    As the function in lategame may be called some thousand times, the results are cached.
+
+    :param hullname: string
+    :returns:        hullType object
+    """
+    hulltype = Cache.hull_by_hullname.get(hullname)
+    if hulltype is None:
+        hulltype = fo.getHullType(hullname)
+        if hulltype:
+            Cache.hull_by_hullname[hullname] = hulltype
+        else:
+            print "FAILURE: Could not find hull", hullname
+            return None
+    return hulltype
 
 
 def _build_reference_name(hullname, partlist):
@@ -1639,17 +1778,3 @@ def _build_reference_name(hullname, partlist):
     :rtype: str
     """
     return "%s-%s" % (hullname, "-".join(sorted(partlist)))  # "Hull-Part1-Part2-Part3-Part4"
-
-
-def _can_build(design, empire_id, pid):
-    # TODO: Remove this function once we stop profiling this module
-    """Check if a design can be built by an empire on a particular planet.
-
-    This function only exists for profiling reasons to add an extra entry to cProfile.
-
-    :param design: design object
-    :param empire_id:
-    :param pid: id of the planet for which the check is performed
-    :return: bool
-    """
-    return design.productionLocationForEmpire(empire_id, pid)